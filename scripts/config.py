@@ -2,6 +2,8 @@
 Database configuration settings
 """
 
+import os
+
 # PostgreSQL connection parameters
 PG_CONFIG = {
     'host': 'localhost',
@@ -11,9 +13,22 @@ PG_CONFIG = {
     'password': 'postgres'
 }
 
+# Connection parameters as used by the scripts (database name under 'dbname')
+DATABASE_CONFIG = {**PG_CONFIG, 'dbname': PG_CONFIG['database']}
+
 # SQLAlchemy connection string
 PG_CONNECTION_STRING = f"postgresql://{PG_CONFIG['user']}:{PG_CONFIG['password']}@{PG_CONFIG['host']}:{PG_CONFIG['port']}/{PG_CONFIG['database']}"
 
+# SQLAlchemy connection pool settings
+POOL_CONFIG = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'pool_recycle': 1800,
+    'pool_pre_ping': True,
+    'pool_use_lifo': True
+}
+
 # Spark JDBC connection parameters
 SPARK_JDBC_CONFIG = {
     'url': f"jdbc:postgresql://{PG_CONFIG['host']}:{PG_CONFIG['port']}/{PG_CONFIG['database']}",
@@ -26,3 +41,6 @@ SPARK_JDBC_CONFIG = {
         'driver': 'org.postgresql.Driver'
     }
 }
+
+# Print DataFrame previews in the example scripts (set DEMO_VERBOSE=0 to disable)
+VERBOSE = os.getenv('DEMO_VERBOSE', '1') == '1'
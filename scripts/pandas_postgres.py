@@ -9,22 +9,84 @@ This script demonstrates how to read from and write to a PostgreSQL database usi
 import pandas as pd
 import os
 import sys
-from sqlalchemy import create_engine
-from config import DATABASE_CONFIG
+import csv
+import tempfile
+from io import StringIO
+from sqlalchemy import create_engine, text
+from config import DATABASE_CONFIG, POOL_CONFIG, VERBOSE
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pacsv = None
+    pq = None
+
+# Sample data locations, relative to the project root directory
+SAMPLE_CSV_PATH = os.path.join('data', 'sample_data.csv')
+SAMPLE_PARQUET_PATH = os.path.join('data', 'sample_data.parquet')
+
+# Shared SQLAlchemy engine, created on first use
+_ENGINE = None
 
 def create_connection():
     """
     Create a database connection to PostgreSQL using SQLAlchemy
+    
+    The engine (and its connection pool) is created once and reused by
+    every subsequent call.
     """
+    global _ENGINE
+    if _ENGINE is not None:
+        return _ENGINE
+
     try:
         conn_string = f"postgresql://{DATABASE_CONFIG['user']}:{DATABASE_CONFIG['password']}@{DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}/{DATABASE_CONFIG['dbname']}"
-        engine = create_engine(conn_string)
-        return engine
+        _ENGINE = create_engine(conn_string, **POOL_CONFIG)
+        return _ENGINE
     except Exception as e:
         print(f"Error connecting to PostgreSQL database: {e}")
         sys.exit(1)
 
-def read_table_to_dataframe(table_name, engine=None, query=None):
+# Compiled text() clauses, keyed by SQL string
+_QUERY_CACHE = {}
+
+def _compile_query(query, params=None):
+    """
+    Return a cached SQLAlchemy text() clause for a SQL string with bind parameters
+    
+    Queries without params are returned unchanged, so a ':name' inside a
+    plain SQL string literal is not mistaken for a bind parameter.
+    """
+    if params is None:
+        return query
+    if query not in _QUERY_CACHE:
+        _QUERY_CACHE[query] = text(query)
+    return _QUERY_CACHE[query]
+
+def _iter_sql_chunks(table_name, engine, query, params, chunksize, dtype_backend):
+    """
+    Yield DataFrame chunks from PostgreSQL using a server-side cursor
+    
+    Errors are reported like in read_table_to_dataframe and end the iteration.
+    """
+    try:
+        with engine.connect().execution_options(stream_results=True, max_row_buffer=chunksize) as con:
+            if query:
+                chunks = pd.read_sql(_compile_query(query, params), con, params=params,
+                                     chunksize=chunksize, dtype_backend=dtype_backend)
+            else:
+                chunks = pd.read_sql_table(table_name, con, chunksize=chunksize, dtype_backend=dtype_backend)
+            for chunk in chunks:
+                yield chunk
+        print(f"Successfully read data from '{table_name}' table")
+    except Exception as e:
+        print(f"Error reading from PostgreSQL: {e}")
+
+def read_table_to_dataframe(table_name, engine=None, query=None, dtype_backend='pyarrow',
+                            chunksize=None, params=None):
     """
     Read data from PostgreSQL table into a pandas DataFrame
     
@@ -36,26 +98,76 @@ def read_table_to_dataframe(table_name, engine=None, query=None):
         Database connection engine
     query : str, optional
         Custom SQL query instead of table name
+    dtype_backend : str, optional
+        Column dtypes of the result
+        - 'pyarrow': Arrow-backed columns (falls back to 'numpy_nullable' if pyarrow is not installed)
+        - 'numpy_nullable': Nullable NumPy-backed columns
+    chunksize : int, optional
+        If given, stream rows through a server-side cursor and return an
+        iterator of DataFrames with at most this many rows each. Rows are only
+        fetched while iterating, so errors are printed at that point and the
+        iterator simply stops instead of the function returning None
+    params : dict, optional
+        Values for named bind parameters in query (e.g. ':min_id'). Only
+        when params is given is query parsed for bind parameters
         
     Returns:
     --------
-    DataFrame : pandas DataFrame with the query results
+    DataFrame : pandas DataFrame with the query results, or an iterator of
+        DataFrames if chunksize is given
     """
     if engine is None:
         engine = create_connection()
+    if dtype_backend == 'pyarrow' and pa is None:
+        dtype_backend = 'numpy_nullable'
+        
+    if chunksize:
+        return _iter_sql_chunks(table_name, engine, query, params, chunksize, dtype_backend)
         
     try:
         if query:
-            df = pd.read_sql(query, engine)
+            df = pd.read_sql(_compile_query(query, params), engine, params=params,
+                             dtype_backend=dtype_backend)
         else:
-            df = pd.read_sql_table(table_name, engine)
+            df = pd.read_sql_table(table_name, engine, dtype_backend=dtype_backend)
         print(f"Successfully read data from '{table_name}' table")
         return df
     except Exception as e:
         print(f"Error reading from PostgreSQL: {e}")
         return None
 
-def write_dataframe_to_table(df, table_name, engine=None, if_exists='replace'):
+def psql_insert_copy(table, conn, keys, data_iter):
+    """
+    Insertion method for DataFrame.to_sql that uses PostgreSQL COPY
+    
+    Parameters:
+    -----------
+    table : pandas.io.sql.SQLTable
+        Table being written to
+    conn : SQLAlchemy connection
+        Connection used by to_sql
+    keys : list of str
+        Column names
+    data_iter : iterable
+        Iterable of row tuples for the current chunk
+    """
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cur:
+        buf = StringIO()
+        writer = csv.writer(buf)
+        writer.writerows(data_iter)
+        buf.seek(0)
+
+        columns = ', '.join(f'"{k}"' for k in keys)
+        if table.schema:
+            table_name = f'"{table.schema}"."{table.name}"'
+        else:
+            table_name = f'"{table.name}"'
+
+        cur.copy_expert(f'COPY {table_name} ({columns}) FROM STDIN WITH CSV', buf)
+
+def write_dataframe_to_table(df, table_name, engine=None, if_exists='replace',
+                             chunksize=1000, method='multi'):
     """
     Write pandas DataFrame to PostgreSQL table
     
@@ -72,35 +184,165 @@ def write_dataframe_to_table(df, table_name, engine=None, if_exists='replace'):
         - 'fail': Raise a ValueError
         - 'replace': Drop the table before inserting new values
         - 'append': Insert new values to the existing table
+    chunksize : int, optional
+        Number of rows sent to the database per batch
+    method : str or callable, optional
+        SQL insertion clause passed to DataFrame.to_sql
+        - None: One INSERT per row
+        - 'multi': Multiple rows per INSERT statement
+        - psql_insert_copy: Load each batch with PostgreSQL COPY
+        - 'copy': Load all rows with a single PostgreSQL COPY (same as
+          psql_insert_copy with chunksize=None)
     """
     if engine is None:
         engine = create_connection()
         
     try:
-        df.to_sql(table_name, engine, if_exists=if_exists, index=False)
+        if method == 'copy':
+            method, chunksize = psql_insert_copy, None
+        df.to_sql(table_name, engine, if_exists=if_exists, index=False,
+                  chunksize=chunksize, method=method)
         print(f"Successfully wrote DataFrame to '{table_name}' table")
         return True
     except Exception as e:
         print(f"Error writing to PostgreSQL: {e}")
         return False
 
-def load_sample_data():
+def _read_csv_table(path):
+    """
+    Read a CSV file into an Arrow table the way pd.read_csv would parse it
+    
+    Empty fields become nulls, and date/time columns are kept as text
+    (pd.read_csv only parses dates when asked to).
+    """
+    read_options = pacsv.ReadOptions(use_threads=True, block_size=1 << 22)
+    convert_options = pacsv.ConvertOptions(strings_can_be_null=True)
+
+    # Column types are inferred from the first block, so the streaming reader's
+    # schema matches what read_csv will produce
+    schema = pacsv.open_csv(path, read_options=read_options,
+                            convert_options=convert_options).schema
+    temporal = {f.name: pa.string() for f in schema if pa.types.is_temporal(f.type)}
+    if temporal:
+        convert_options = pacsv.ConvertOptions(strings_can_be_null=True, column_types=temporal)
+
+    return pacsv.read_csv(path, read_options=read_options, convert_options=convert_options)
+
+def convert_csv_to_parquet(csv_path=SAMPLE_CSV_PATH, parquet_path=SAMPLE_PARQUET_PATH):
+    """
+    Convert a CSV file to a Snappy-compressed Parquet file
+    
+    Parameters:
+    -----------
+    csv_path : str, optional
+        Path of the CSV file to convert
+    parquet_path : str, optional
+        Path of the Parquet file to write
+        
+    Returns:
+    --------
+    str : Path of the written Parquet file, or None on failure
+    """
+    if pacsv is None:
+        print("pyarrow is required to convert CSV to Parquet")
+        return None
+
+    try:
+        table = _read_csv_table(csv_path)
+        pq.write_table(table, parquet_path, compression='snappy')
+        print(f"Successfully converted {csv_path} to {parquet_path}")
+        return parquet_path
+    except Exception as e:
+        print(f"Error converting {csv_path} to Parquet: {e}")
+        return None
+
+def is_parquet_current(parquet_path=SAMPLE_PARQUET_PATH, csv_path=SAMPLE_CSV_PATH):
+    """
+    Check whether a Parquet copy exists and is at least as new as its source CSV
+    
+    Parameters:
+    -----------
+    parquet_path : str, optional
+        Path of the Parquet copy
+    csv_path : str, optional
+        Path of the CSV file it was converted from
+    """
+    if not os.path.exists(parquet_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+
+def load_sample_data(path=None, engine='pyarrow'):
     """
-    Load sample data from CSV file
+    Load sample data from a Parquet or CSV file
+    
+    Parameters:
+    -----------
+    path : str, optional
+        File to load. Files ending in '.parquet' are read as Parquet, anything
+        else as CSV. Defaults to data/sample_data.parquet if it exists and is
+        not older than data/sample_data.csv, otherwise data/sample_data.csv
+    engine : str, optional
+        CSV parser to use
+        - 'pyarrow': Multithreaded native parser (falls back to 'c' if pyarrow is not installed)
+        - 'c': Default pandas C parser
     """
     try:
         # Assuming script is run from project root directory
-        sample_data_path = os.path.join('data', 'sample_data.csv')
-        df = pd.read_csv(sample_data_path)
-        print(f"Successfully loaded sample data from {sample_data_path}")
+        if path is None:
+            if is_parquet_current():
+                path = SAMPLE_PARQUET_PATH
+            else:
+                path = SAMPLE_CSV_PATH
+
+        if path.endswith('.parquet'):
+            df = pd.read_parquet(path, engine='pyarrow')
+        elif engine == 'pyarrow' and pacsv is not None:
+            df = _read_csv_table(path).to_pandas()
+        else:
+            df = pd.read_csv(path, engine='c')
+        print(f"Successfully loaded sample data from {path}")
         return df
     except Exception as e:
         print(f"Error loading sample data: {e}")
         return None
 
-def run_basic_examples():
+def save_dataframe(df, path):
+    """
+    Save pandas DataFrame to a CSV file
+    
+    Uses the pyarrow CSV writer when available, falling back to
+    DataFrame.to_csv. The DataFrame index is not written.
+    
+    Parameters:
+    -----------
+    df : pandas DataFrame
+        DataFrame to save
+    path : str
+        Path of the CSV file to write
+    """
+    try:
+        if pacsv is not None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            pacsv.write_csv(table, path, write_options=pacsv.WriteOptions(include_header=True))
+        else:
+            df.to_csv(path, index=False)
+        print(f"Successfully saved DataFrame to {path}")
+        return True
+    except Exception as e:
+        print(f"Error saving DataFrame to {path}: {e}")
+        return False
+
+def run_basic_examples(output_path=None):
     """
     Run basic examples showing Pandas-PostgreSQL integration
+    
+    Parameters:
+    -----------
+    output_path : str, optional
+        CSV file the custom query results are exported to. Defaults to a
+        new uniquely named file in the system temporary directory
     """
     # Create connection
     engine = create_connection()
@@ -115,16 +357,24 @@ def run_basic_examples():
     
     # Read data back from PostgreSQL
     result_df = read_table_to_dataframe('sample_data', engine)
-    if result_df is not None:
+    if result_df is not None and VERBOSE:
         print("\nFirst 5 rows from database:")
-        print(result_df.head())
+        print(result_df.head(5).to_string(max_cols=8))
     
     # Example of custom query
-    custom_query = "SELECT * FROM sample_data ORDER BY id LIMIT 3"
-    query_df = read_table_to_dataframe('sample_data', engine, query=custom_query)
+    custom_query = "SELECT * FROM sample_data ORDER BY id LIMIT :limit"
+    query_df = read_table_to_dataframe('sample_data', engine, query=custom_query,
+                                       params={'limit': 3})
     if query_df is not None:
-        print("\nCustom query results:")
-        print(query_df)
+        if VERBOSE:
+            print("\nCustom query results:")
+            print(query_df.to_string(max_cols=8))
+        
+        # Export query results
+        if output_path is None:
+            fd, output_path = tempfile.mkstemp(prefix='query_results_', suffix='.csv')
+            os.close(fd)
+        save_dataframe(query_df, output_path)
 
 if __name__ == "__main__":
     run_basic_examples()
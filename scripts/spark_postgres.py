@@ -8,20 +8,28 @@ This script demonstrates how to read from and write to PostgreSQL using Apache S
 
 import os
 import sys
-from pyspark.sql import SparkSession
-from pyspark.sql.functions import col, avg, sum, count
 import pandas as pd
 from config import DATABASE_CONFIG
 
 def create_spark_session():
     """
     Create a Spark session with PostgreSQL JDBC driver
+    
+    getOrCreate() returns the active session if there is one, and builds a
+    new one after a previous session has been stopped.
     """
+    from pyspark.sql import SparkSession
+
     try:
-        # Create a Spark session with PostgreSQL JDBC driver
+        # Create a Spark session with PostgreSQL JDBC driver (downloaded from Maven)
+        # and Arrow-based pandas <-> Spark conversion
         spark = (SparkSession.builder
                 .appName("PostgreSQL-Spark Integration")
-                .config("spark.jars", "postgresql-42.5.1.jar")  # Make sure to download this JAR file
+                .config("spark.jars.packages", "org.postgresql:postgresql:42.7.3")
+                .config("spark.sql.execution.arrow.pyspark.enabled", "true")
+                .config("spark.sql.execution.arrow.pyspark.fallback.enabled", "true")
+                .config("spark.sql.execution.arrow.maxRecordsPerBatch", "20000")
+                .config("spark.sql.adaptive.enabled", "true")
                 .getOrCreate())
         
         return spark
@@ -32,8 +40,11 @@ def create_spark_session():
 def get_jdbc_url():
     """
     Create JDBC URL for PostgreSQL connection
+    
+    reWriteBatchedInserts lets the driver turn batched INSERTs into
+    multi-row INSERT statements.
     """
-    return f"jdbc:postgresql://{DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}/{DATABASE_CONFIG['dbname']}"
+    return f"jdbc:postgresql://{DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}/{DATABASE_CONFIG['dbname']}?reWriteBatchedInserts=true"
 
 def get_connection_properties():
     """
@@ -45,7 +56,9 @@ def get_connection_properties():
         "driver": "org.postgresql.Driver"
     }
 
-def read_table_to_spark_df(spark, table_name):
+def read_table_to_spark_df(spark, table_name=None, query=None, partition_column=None,
+                           lower_bound=None, upper_bound=None, num_partitions=8,
+                           fetch_size=10000):
     """
     Read PostgreSQL table into a Spark DataFrame
     
@@ -53,32 +66,68 @@ def read_table_to_spark_df(spark, table_name):
     -----------
     spark : SparkSession
         Active Spark session
-    table_name : str
+    table_name : str, optional
         Name of the table to read
+    query : str, optional
+        SQL query executed by PostgreSQL instead of reading table_name, so
+        only its result is transferred. Cannot be combined with partition_column
+    partition_column : str, optional
+        Numeric, date or timestamp column used to split the read into
+        parallel queries. Requires lower_bound and upper_bound
+    lower_bound : int or str, optional
+        Minimum value of partition_column used to compute partition strides
+    upper_bound : int or str, optional
+        Maximum value of partition_column used to compute partition strides
+    num_partitions : int, optional
+        Number of parallel JDBC queries when partition_column is set
+    fetch_size : int, optional
+        Number of rows fetched per round trip
         
     Returns:
     --------
     DataFrame : Spark DataFrame with the table data
     """
+    source = table_name if query is None else "query"
+    if partition_column is not None:
+        if query is not None:
+            print("Error: partition_column cannot be combined with query; use table_name instead")
+            return None
+        if lower_bound is None or upper_bound is None:
+            print("Error: partition_column requires both lower_bound and upper_bound")
+            return None
+    
     try:
-        df = (spark.read
-             .format("jdbc")
-             .option("url", get_jdbc_url())
-             .option("dbtable", table_name)
-             .option("user", DATABASE_CONFIG['user'])
-             .option("password", DATABASE_CONFIG['password'])
-             .option("driver", "org.postgresql.Driver")
-             .load())
-        
-        print(f"Successfully read '{table_name}' into Spark DataFrame")
+        reader = (spark.read
+                 .format("jdbc")
+                 .option("url", get_jdbc_url())
+                 .option("user", DATABASE_CONFIG['user'])
+                 .option("password", DATABASE_CONFIG['password'])
+                 .option("driver", "org.postgresql.Driver")
+                 .option("fetchsize", fetch_size))
+        
+        if query is not None:
+            reader = reader.option("query", query)
+        else:
+            reader = reader.option("dbtable", table_name)
+        
+        if partition_column is not None:
+            reader = (reader
+                     .option("partitionColumn", partition_column)
+                     .option("lowerBound", lower_bound)
+                     .option("upperBound", upper_bound)
+                     .option("numPartitions", num_partitions))
+        
+        df = reader.load()
+        
+        print(f"Successfully read '{source}' into Spark DataFrame")
         return df
     except Exception as e:
-        print(f"Error reading table '{table_name}': {e}")
+        print(f"Error reading table '{source}': {e}")
         return None
 
 def load_sample_data_to_spark(spark):
     """
-    Load sample data from CSV to Spark DataFrame
+    Load sample data from Parquet (or CSV) to Spark DataFrame
     
     Parameters:
     -----------
@@ -89,12 +138,30 @@ def load_sample_data_to_spark(spark):
     --------
     DataFrame : Spark DataFrame with sample data
     """
+    from pandas_postgres import convert_csv_to_parquet, is_parquet_current
+
     try:
         # Assuming script is run from project root directory
-        sample_data_path = os.path.join('data', 'sample_data.csv')
+        parquet_path = os.path.join('data', 'sample_data.parquet')
+        csv_path = os.path.join('data', 'sample_data.csv')
+        cache_dir = '.spark_cache'
+        cache_path = os.path.join(cache_dir, 'sample_data.parquet')
         
-        # Read CSV file into Spark DataFrame
-        df = spark.read.csv(sample_data_path, header=True, inferSchema=True)
+        # Prefer a Parquet copy, which skips CSV parsing and schema inference.
+        # Without an up-to-date data/sample_data.parquet, convert the CSV with the
+        # pyarrow reader into a project-local cache (gitignored, not in data/).
+        if is_parquet_current(parquet_path, csv_path):
+            sample_data_path = parquet_path
+        elif is_parquet_current(cache_path, csv_path):
+            sample_data_path = cache_path
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+            sample_data_path = convert_csv_to_parquet(csv_path, cache_path) or csv_path
+        
+        if sample_data_path.endswith('.parquet'):
+            df = spark.read.parquet(sample_data_path)
+        else:
+            df = spark.read.csv(sample_data_path, header=True, inferSchema=True)
         print(f"Successfully loaded sample data from {sample_data_path}")
         return df
     except Exception as e:
@@ -108,9 +175,14 @@ def load_sample_data_to_spark(spark):
             'amount': [120.5, 85.2, 200.0, 65.7, 150.3, 95.6, 180.2, 110.4, 75.9, 220.1],
             'date': pd.date_range(start='2023-01-01', periods=10).strftime('%Y-%m-%d').tolist()
         })
+        
+        # Transfer the pandas DataFrame as Arrow record batches rather than
+        # pickled rows (requires pyarrow >= 4.0). The session may not have
+        # been created by create_spark_session, so enable it explicitly.
+        spark.conf.set("spark.sql.execution.arrow.pyspark.enabled", "true")
         return spark.createDataFrame(pandas_df)
 
-def write_spark_df_to_table(df, table_name, mode="overwrite"):
+def write_spark_df_to_table(df, table_name, mode="overwrite", batch_size=10000):
     """
     Write Spark DataFrame to PostgreSQL table
     
@@ -122,6 +194,8 @@ def write_spark_df_to_table(df, table_name, mode="overwrite"):
         Name of the table to write to
     mode : str, optional
         Write mode (overwrite, append, ignore, error)
+    batch_size : int, optional
+        Number of rows sent per JDBC batch
     """
     try:
         (df.write
@@ -131,6 +205,8 @@ def write_spark_df_to_table(df, table_name, mode="overwrite"):
            .option("user", DATABASE_CONFIG['user'])
            .option("password", DATABASE_CONFIG['password'])
            .option("driver", "org.postgresql.Driver")
+           .option("batchsize", batch_size)
+           .option("isolationLevel", "NONE")
            .mode(mode)
            .save())
         
@@ -149,7 +225,18 @@ def demonstrate_spark_transformations(df):
     df : Spark DataFrame
         DataFrame to transform
     """
+    from pyspark import StorageLevel
+    from pyspark.sql.functions import col, avg, sum, count
+
+    persisted = False
     try:
+        # Materialise df once so the actions below do not each re-run the source
+        # (e.g. a full JDBC read). A cache set up by the caller is left alone.
+        if not df.is_cached:
+            df = df.persist(StorageLevel.MEMORY_AND_DISK)
+            persisted = True
+            df.count()
+        
         print("\nDemonstrating Spark DataFrame transformations:")
         
         # Print schema
@@ -183,6 +270,37 @@ def demonstrate_spark_transformations(df):
     except Exception as e:
         print(f"Error during Spark transformations: {e}")
         print("Please adjust the transformations to match your actual data schema.")
+    finally:
+        if persisted:
+            df.unpersist()
+
+def run_pushdown_aggregation_example(spark, table_name="sample_data"):
+    """
+    Aggregate a PostgreSQL table inside the database and read only the result
+    
+    Unlike aggregating a DataFrame loaded with read_table_to_spark_df, only
+    one row per category is transferred over JDBC.
+    
+    Parameters:
+    -----------
+    spark : SparkSession
+        Active Spark session
+    table_name : str, optional
+        PostgreSQL table with 'id', 'category' and 'amount' columns
+    """
+    query = f"""
+        SELECT category,
+               COUNT(id) AS count,
+               AVG(amount) AS avg_amount,
+               SUM(amount) AS total_amount
+        FROM {table_name}
+        GROUP BY category
+    """
+    
+    result = read_table_to_spark_df(spark, query=query)
+    if result is not None:
+        print(f"\nAggregation of '{table_name}' computed by PostgreSQL:")
+        result.show()
 
 def run_spark_sql_example(spark, df):
     """
@@ -2,15 +2,30 @@
 # -*- coding: utf-8 -*-
 
 """
-SQL queries on Pandas DataFrames using pandasql.
+SQL queries on Pandas DataFrames using DuckDB.
 This script demonstrates how to use SQL syntax to query Pandas DataFrames.
 """
 
 import pandas as pd
 import numpy as np
 import os
-from pandasql import sqldf
+from config import VERBOSE
 from pandas_postgres import load_sample_data, create_connection, read_table_to_dataframe
+# pyarrow is optional; pandas_postgres sets pa to None when it is not installed
+from pandas_postgres import pa
+
+# Shared in-memory DuckDB connection used for all queries, created on first use
+_DUCKDB_CON = None
+
+def _get_duckdb_connection():
+    """
+    Return the shared DuckDB connection, importing duckdb on first use
+    """
+    global _DUCKDB_CON
+    if _DUCKDB_CON is None:
+        import duckdb
+        _DUCKDB_CON = duckdb.connect()
+    return _DUCKDB_CON
 
 # Helper function to run SQL queries on pandas DataFrames
 def run_sql_query(query, local_vars=None):
@@ -22,7 +37,7 @@ def run_sql_query(query, local_vars=None):
     query : str
         SQL query to run
     local_vars : dict, optional
-        Dictionary of local variables (DataFrames) to query
+        Dictionary of local variables (pandas DataFrames or Arrow tables) to query
         
     Returns:
     --------
@@ -30,46 +45,80 @@ def run_sql_query(query, local_vars=None):
     """
     if local_vars is None:
         local_vars = locals()
-    return sqldf(query, local_vars)
 
-def create_example_dataframes():
+    con = _get_duckdb_connection()
+
+    # Expose DataFrames and Arrow tables to DuckDB as views (no data is copied)
+    table_types = (pd.DataFrame,) if pa is None else (pd.DataFrame, pa.Table)
+    names = [name for name, val in local_vars.items() if isinstance(val, table_types)]
+    for name in names:
+        con.register(name, local_vars[name])
+    try:
+        return con.execute(query).fetch_df()
+    finally:
+        for name in names:
+            con.unregister(name)
+
+def _make_table(columns):
     """
-    Create example DataFrames to demonstrate SQL queries
+    Build an Arrow table from a dict of columns, or a pandas DataFrame if
+    pyarrow is not installed
+    """
+    if pa is None:
+        return pd.DataFrame(columns)
+    return pa.table(columns)
+
+def _head(table, n=5):
+    """
+    Return the first n rows of an Arrow table or pandas DataFrame as a DataFrame
+    """
+    if isinstance(table, pd.DataFrame):
+        return table.head(n)
+    return table.slice(0, n).to_pandas()
+
+def create_example_tables():
+    """
+    Create example tables to demonstrate SQL queries
+    
+    The tables are Arrow tables, which DuckDB scans in place, or pandas
+    DataFrames when pyarrow is not installed.
     """
-    # Create a customers DataFrame
-    customers = pd.DataFrame({
-        'customer_id': range(1, 6),
+    # Create a customers table
+    customers = _make_table({
+        'customer_id': np.arange(1, 6, dtype=np.int32),
         'name': ['John Smith', 'Emma Johnson', 'Michael Brown', 'Olivia Davis', 'William Wilson'],
         'email': ['john@example.com', 'emma@example.com', 'michael@example.com', 
-                 'olivia@example.com', 'william@example.com'],
-        'age': [35, 28, 42, 31, 45],
-        'signup_date': pd.to_datetime(['2023-01-15', '2023-02-20', '2023-01-05', 
-                                      '2023-03-10', '2023-02-01'])
+                  'olivia@example.com', 'william@example.com'],
+        'age': np.array([35, 28, 42, 31, 45], dtype=np.int32),
+        'signup_date': np.array(['2023-01-15', '2023-02-20', '2023-01-05', 
+                                 '2023-03-10', '2023-02-01'], dtype='datetime64[D]')
     })
     
-    # Create an orders DataFrame
-    orders = pd.DataFrame({
-        'order_id': range(101, 111),
-        'customer_id': [1, 2, 3, 1, 4, 2, 5, 3, 4, 5],
-        'order_date': pd.to_datetime(['2023-03-01', '2023-03-05', '2023-03-10', 
-                                     '2023-03-15', '2023-03-20', '2023-03-25', 
-                                     '2023-04-01', '2023-04-05', '2023-04-10', '2023-04-15']),
-        'amount': [120.50, 85.20, 200.00, 65.75, 150.30, 95.60, 180.20, 110.40, 75.90, 220.10]
+    # Create an orders table
+    orders = _make_table({
+        'order_id': np.arange(101, 111, dtype=np.int32),
+        'customer_id': np.array([1, 2, 3, 1, 4, 2, 5, 3, 4, 5], dtype=np.int32),
+        'order_date': np.array(['2023-03-01', '2023-03-05', '2023-03-10', 
+                                '2023-03-15', '2023-03-20', '2023-03-25', 
+                                '2023-04-01', '2023-04-05', '2023-04-10', '2023-04-15'],
+                               dtype='datetime64[D]'),
+        'amount': np.array([120.50, 85.20, 200.00, 65.75, 150.30, 95.60, 180.20, 110.40, 75.90, 220.10])
     })
     
     return customers, orders
 
 def run_sqldf_examples():
     """
-    Run example SQL queries on pandas DataFrames
+    Run example SQL queries on in-memory tables
     """
-    # Create example DataFrames
-    customers, orders = create_example_dataframes()
+    # Create example tables
+    customers, orders = create_example_tables()
     
-    print("Customers DataFrame:")
-    print(customers.head())
-    print("\nOrders DataFrame:")
-    print(orders.head())
+    if VERBOSE:
+        print("Customers table:")
+        print(_head(customers).to_string(max_cols=8))
+        print("\nOrders table:")
+        print(_head(orders).to_string(max_cols=8))
     
     # Example 1: Basic SELECT query
     query1 = """
@@ -79,8 +128,9 @@ def run_sqldf_examples():
     ORDER BY age DESC;
     """
     result1 = run_sql_query(query1, locals())
-    print("\nExample 1: Customers older than 30, ordered by age:")
-    print(result1)
+    if VERBOSE:
+        print("\nExample 1: Customers older than 30, ordered by age:")
+        print(result1.to_string(max_cols=8))
     
     # Example 2: JOIN operation
     query2 = """
@@ -90,20 +140,22 @@ def run_sqldf_examples():
     ORDER BY o.order_date;
     """
     result2 = run_sql_query(query2, locals())
-    print("\nExample 2: Join customers with their orders:")
-    print(result2)
+    if VERBOSE:
+        print("\nExample 2: Join customers with their orders:")
+        print(result2.to_string(max_cols=8))
     
     # Example 3: Aggregation
     query3 = """
     SELECT c.name, COUNT(o.order_id) as order_count, SUM(o.amount) as total_spent
     FROM customers c
     JOIN orders o ON c.customer_id = o.customer_id
-    GROUP BY c.customer_id
+    GROUP BY c.customer_id, c.name
     ORDER BY total_spent DESC;
     """
     result3 = run_sql_query(query3, locals())
-    print("\nExample 3: Customer order counts and total spending:")
-    print(result3)
+    if VERBOSE:
+        print("\nExample 3: Customer order counts and total spending:")
+        print(result3.to_string(max_cols=8))
     
     # Example 4: Subquery
     query4 = """
@@ -117,8 +169,9 @@ def run_sqldf_examples():
     );
     """
     result4 = run_sql_query(query4, locals())
-    print("\nExample 4: Customers who spent more than $200:")
-    print(result4)
+    if VERBOSE:
+        print("\nExample 4: Customers who spent more than $200:")
+        print(result4.to_string(max_cols=8))
     
     # Example 5: Date filtering
     query5 = """
@@ -129,8 +182,9 @@ def run_sqldf_examples():
     ORDER BY o.order_date;
     """
     result5 = run_sql_query(query5, locals())
-    print("\nExample 5: Orders from March 15, 2023 and later:")
-    print(result5)
+    if VERBOSE:
+        print("\nExample 5: Orders from March 15, 2023 and later:")
+        print(result5.to_string(max_cols=8))
 
 def run_database_examples():
     """
@@ -144,8 +198,9 @@ def run_database_examples():
         df = read_table_to_dataframe('sample_data', engine)
         
         if df is not None:
-            print("\nDataFrame from PostgreSQL:")
-            print(df.head())
+            if VERBOSE:
+                print("\nDataFrame from PostgreSQL:")
+                print(df.head(5).to_string(max_cols=8))
             
             # Example SQL query on DataFrame from database
             query = """
@@ -155,8 +210,9 @@ def run_database_examples():
             LIMIT 5;
             """
             result = run_sql_query(query, locals())
-            print("\nSQL query on DataFrame from database:")
-            print(result)
+            if VERBOSE:
+                print("\nSQL query on DataFrame from database:")
+                print(result.to_string(max_cols=8))
     except Exception as e:
         print(f"Error running database examples: {e}")
 